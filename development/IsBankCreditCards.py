@@ -3,9 +3,9 @@ import json
 import logging
 from datetime import datetime
 from data_processing import create_jsonl_for_training
-from fine_tuning import fine_tune_model
+from fine_tuning import fine_tune_model, fine_tune_sweep, estimate_jsonl_tokens
 from cutoff_utils import get_cutoff_text_from_excel, verify_cutoff_in_pdf
-from config_utils import get_api_key, save_model_info, get_default_epochs, get_model_pricing
+from config_utils import get_api_key, save_model_info, get_default_epochs, get_model_pricing, get_fine_tune_sweep_grid
 
 # Klasör yapılandırması
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -26,11 +26,13 @@ logging.basicConfig(
 )
 
 def get_saved_models():
-  """Kaydedilmiş model bilgilerini yükler."""
+  """Kaydedilmiş ve eğitimi başarıyla tamamlanmış model bilgilerini yükler."""
   try:
       if os.path.exists(model_info_path):
           with open(model_info_path, 'r', encoding='utf-8') as f:
-              return json.load(f)
+              # Durumu olmayan eski kayıtlar tamamlanmış eğitimlerdir
+              return [model for model in json.load(f)
+                      if model.get("status", "succeeded") == "succeeded"]
   except Exception as e:
       logging.error(f"Model bilgileri yüklenemedi: {e}")
   return []
@@ -121,34 +123,7 @@ def calculate_estimated_cost(jsonl_path, model_type, epochs):
       pricing = get_model_pricing()
       cost_per_1M = pricing[model_type]["training_cost_per_1M"]
 
-      total_tokens = 0
-      with open(jsonl_path, 'r', encoding='utf-8') as f:
-          for line in f:
-              entry = json.loads(line)
-              for message in entry["messages"]:
-                  content = message["content"]
-                  # Daha gelişmiş token hesaplama
-                  # Her kelime ortalama 1.3 token
-                  # Her sayı için +1 token
-                  # Her özel karakter için +1 token
-                  # JSON yapısı için ekstra tokenler
-                  words = content.split()
-                  estimated_tokens = 0
-                  for word in words:
-                      # Temel token sayısı
-                      estimated_tokens += len(word) / 3  # 3 karakter ≈ 1 token
-                      # Sayılar için ek token
-                      if any(c.isdigit() for c in word):
-                          estimated_tokens += 0.5
-                      # Özel karakterler için ek token
-                      if any(not c.isalnum() for c in word):
-                          estimated_tokens += 0.5
-
-                  # JSON yapısı için ek tokenler
-                  if message["role"] == "assistant":
-                      estimated_tokens *= 1.2  # JSON yapısı için %20 ek token
-
-                  total_tokens += estimated_tokens
+      total_tokens = estimate_jsonl_tokens(jsonl_path)
 
       # Training tokens = input tokens * epoch sayısı
       total_training_tokens = total_tokens * epochs
@@ -161,6 +136,77 @@ def calculate_estimated_cost(jsonl_path, model_type, epochs):
       logging.error(f"Maliyet hesaplama hatası: {e}")
       return 0, 0
 
+def estimate_sweep_costs(total_tokens, model_types, epoch_values):
+  """Tek bir token sayısından tüm (model tipi, epoch) kombinasyonlarının maliyetini hesaplar."""
+  pricing = get_model_pricing()
+  configs = []
+  for model_type in model_types:
+      if model_type not in pricing:
+          logging.warning(f"{model_type} için fiyat bilgisi bulunamadı, atlanıyor.")
+          continue
+      cost_per_1M = pricing[model_type]["training_cost_per_1M"]
+      for epochs in epoch_values:
+          total_training_tokens = total_tokens * epochs
+          configs.append({
+              "model_type": model_type,
+              "epochs": epochs,
+              "estimated_training_tokens": total_training_tokens,
+              "estimated_cost": (cost_per_1M / 1_000_000) * total_training_tokens
+          })
+  return configs
+
+def run_sweep(api_key, jsonl_path):
+  """Model tipi ve epoch ızgarasını fiyatlandırır, seçilen işleri birlikte başlatır."""
+  model_types, epoch_values = get_fine_tune_sweep_grid()
+  total_tokens = estimate_jsonl_tokens(jsonl_path)
+  configs = estimate_sweep_costs(total_tokens, model_types, epoch_values)
+  if not configs:
+      print("Fiyatlandırılabilecek konfigürasyon bulunamadı.")
+      return
+
+  print(f"\nTahmini base token sayısı: {total_tokens:,.2f}")
+  print("\nKonfigürasyonlar:")
+  for idx, config in enumerate(configs, 1):
+      print(f"{idx}. {config['model_type']} - {config['epochs']} epoch - "
+            f"{config['estimated_training_tokens']:,.2f} token - ${config['estimated_cost']:.2f}")
+  print("\nNot: Bu maliyetler tahminidir. Gerçek maliyet farklılık gösterebilir.")
+
+  while True:
+      choice = input("\nBaşlatılacak konfigürasyonlar (ör. 1,3,4 / T: tümü / boş: iptal): ").strip().upper()
+      if not choice:
+          print("İşlem iptal edildi.")
+          return
+      if choice == 'T':
+          selected = configs
+          break
+      parts = [p.strip() for p in choice.split(',')]
+      if all(p.isdigit() and 1 <= int(p) <= len(configs) for p in parts):
+          selected = [configs[int(p) - 1] for p in dict.fromkeys(parts)]
+          break
+      print("Lütfen geçerli bir seçim yapın.")
+
+  total_cost = sum(config["estimated_cost"] for config in selected)
+  proceed = input(f"\n{len(selected)} eğitim için toplam tahmini maliyet ${total_cost:.2f}. Başlatılsın mı? (E/H): ").upper()
+  if proceed != 'E':
+      print("İşlem iptal edildi.")
+      return
+
+  model_explanation = input("\nModel açıklaması: ")
+  results = fine_tune_sweep(
+      api_key=api_key,
+      jsonl_file=jsonl_path,
+      configs=selected,
+      explanation=model_explanation
+  )
+
+  succeeded = [result for result in results if result["status"] == "succeeded"]
+  print(f"\n{len(succeeded)}/{len(selected)} eğitim tamamlandı.")
+  for result in results:
+      print(f"{result['model_type']} - {result['epochs']} epoch - Model ID: {result['model_id']} - "
+            f"durum: {result['status']} - "
+            f"tahmini token: {result['estimated_training_tokens']:,.2f}, "
+            f"gerçek token: {result['trained_tokens']}")
+
 def main():
   # Dosyaları işle ve JSONL dosyası oluştur/kontrol et
   proceed_training, jsonl_path = process_files()
@@ -185,8 +231,13 @@ def main():
       print("3. GPT-3.5 Turbo (Temel performans)")
       print("4. Eğitilmiş model seçimi")
       print("5. Kayıtlı olmayan model")
+      print("6. Çoklu konfigürasyon karşılaştırması (sweep)")
+
+      choice = input("Seçiminiz (1-6): ")
 
-      choice = input("Seçiminiz (1-5): ")
+      if choice == "6":
+          run_sweep(api_key, jsonl_path)
+          return
 
       if choice == "4":
           saved_models = get_saved_models()
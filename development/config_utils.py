@@ -65,6 +65,35 @@ def save_model_info(model_data):
     except Exception as e:
         logging.error(f"Model bilgileri kaydedilemedi: {e}")
 
+def update_model_info(model_id, updates):
+    """
+    Kayıtlı bir modelin bilgilerini model_id ile bulup günceller.
+    """
+    try:
+        if not os.path.exists(model_info_path):
+            logging.error(f"Model bilgileri dosyası bulunamadı: {model_info_path}")
+            return False
+
+        with open(model_info_path, 'r', encoding='utf-8') as f:
+            model_info = json.load(f)
+
+        for entry in model_info:
+            if entry.get("model_id") == model_id:
+                entry.update(updates)
+                break
+        else:
+            logging.error(f"Güncellenecek model bulunamadı: {model_id}")
+            return False
+
+        with open(model_info_path, 'w', encoding='utf-8') as f:
+            json.dump(model_info, f, indent=4, ensure_ascii=False)
+
+        logging.info(f"Model bilgileri güncellendi: {model_id}")
+        return True
+    except Exception as e:
+        logging.error(f"Model bilgileri güncellenemedi: {e}")
+        return False
+
 def get_api_key():
     """
     OpenAI API anahtarını yükler.
@@ -93,4 +122,45 @@ def get_model_pricing():
 def get_default_epochs():
   """Varsayılan epoch sayısını döndürür."""
   config = load_config()
-  return config.get("default_epochs", 10)
\ No newline at end of file
+  return config.get("default_epochs", 10)
+
+def get_cutoff_fallback_markers():
+  """Cutoff metni bulunamadığında denenecek yedek işaretleri döndürür."""
+  config = load_config()
+  return config.get("cutoff_fallback_markers", [])
+
+def get_fine_tune_sweep_grid():
+  """Çoklu eğitim (sweep) için model tipi ve epoch listelerini döndürür."""
+  config = load_config()
+  default_model_types = list(config.get("model_pricing", {}).keys())
+  default_epochs = [config.get("default_epochs", 10)]
+
+  grid = config.get("fine_tune_sweep", {})
+  if not isinstance(grid, dict):
+      logging.warning("fine_tune_sweep bir sözlük olmalı. Varsayılan değerler kullanılıyor.")
+      grid = {}
+
+  model_types = grid.get("model_types") or default_model_types
+  if not isinstance(model_types, list):
+      logging.warning("fine_tune_sweep.model_types bir liste olmalı. Varsayılan değerler kullanılıyor.")
+      model_types = default_model_types
+  valid_model_types = []
+  for model_type in model_types:
+      if isinstance(model_type, str) and model_type.strip():
+          valid_model_types.append(model_type.strip())
+      else:
+          logging.warning(f"Geçersiz model tipi atlanıyor: {model_type!r}")
+
+  epochs = grid.get("epochs") or default_epochs
+  if not isinstance(epochs, list):
+      logging.warning("fine_tune_sweep.epochs bir liste olmalı. Varsayılan değerler kullanılıyor.")
+      epochs = default_epochs
+  valid_epochs = []
+  for epoch in epochs:
+      # bool da int sayıldığı için ayrıca eleniyor
+      if isinstance(epoch, int) and not isinstance(epoch, bool) and epoch > 0:
+          valid_epochs.append(epoch)
+      else:
+          logging.warning(f"Geçersiz epoch değeri atlanıyor: {epoch!r}")
+
+  return list(dict.fromkeys(valid_model_types)), list(dict.fromkeys(valid_epochs))
\ No newline at end of file
@@ -1,6 +1,20 @@
+import os
+import re
+import sys
+import json
 import logging
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import fitz  # PyMuPDF için
+from config_utils import get_cutoff_fallback_markers
+
+# Toplu doğrulama raporundaki durum değerleri
+STATUS_OK = "OK"
+STATUS_FALLBACK = "FALLBACK"
+STATUS_MISMATCH = "MISMATCH"
+STATUS_NO_CUTOFF = "NO_CUTOFF"
+STATUS_READ_ERROR = "READ_ERROR"
 
 def get_cutoff_text_from_excel(excel_path):
     try:
@@ -22,10 +36,14 @@ def get_cutoff_text_from_excel(excel_path):
         logging.error(f"{excel_path} dosyasını okurken hata oluştu: {e}")
         return "READ_ERROR"
 
+def extract_pdf_text(pdf_path):
+    """PDF dosyasındaki tüm sayfaların metnini birleştirip döndürür."""
+    with fitz.open(pdf_path) as doc:
+        return ''.join(page.get_text() for page in doc)
+
 def verify_cutoff_in_pdf(pdf_path, cutoff_text):
     try:
-        with fitz.open(pdf_path) as doc:
-            pdf_text = ''.join(page.get_text() for page in doc)
+        pdf_text = extract_pdf_text(pdf_path)
 
         if cutoff_text and cutoff_text in pdf_text:
             return cutoff_text
@@ -53,3 +71,200 @@ def verify_cutoff_in_pdf(pdf_path, cutoff_text):
     except Exception as e:
         logging.error(f"{pdf_path} dosyasını okurken hata oluştu: {e}")
         return "READ_ERROR"
+
+
+def find_cutoff_pairs(folder):
+    """Klasördeki aynı isimli PDF ve XLSX dosya çiftlerini (pdf_path, excel_path) olarak döndürür."""
+    pairs = []
+    for file_name in sorted(os.listdir(folder)):
+        if not file_name.lower().endswith('.pdf'):
+            continue
+        excel_path = os.path.join(folder, os.path.splitext(file_name)[0] + '.xlsx')
+        if os.path.exists(excel_path):
+            pairs.append((os.path.join(folder, file_name), excel_path))
+        else:
+            logging.warning(f"{file_name} için Excel dosyası bulunamadı, atlanıyor.")
+    return pairs
+
+def find_markers(text, markers):
+    """Metni tek geçişte tarar ve içinde geçen işaretleri ilk görülme sırasıyla döndürür."""
+    markers = [m for m in dict.fromkeys(markers) if m]
+    if not markers:
+        return []
+    # Uzun işaretler önce denensin ki birbirini içeren işaretler kaybolmasın
+    pattern = re.compile('|'.join(re.escape(m) for m in sorted(markers, key=len, reverse=True)))
+    found = []
+    position = 0
+    while len(found) < len(markers):
+        match = pattern.search(text, position)
+        if not match:
+            break
+        # Aynı konumda başlayan daha kısa işaretler de bulunmuş sayılır
+        for marker in markers:
+            if marker not in found and text.startswith(marker, match.start()):
+                found.append(marker)
+        position = match.start() + 1
+    return found
+
+def verify_cutoff_pair(pdf_path, excel_path, fallback_markers=()):
+    """
+    Tek bir PDF/XLSX çiftini etkileşimsiz olarak doğrular ve rapor satırını döndürür.
+    """
+    result = {
+        "pdf": pdf_path,
+        "excel": excel_path,
+        "expected_cutoff": None,
+        "found_markers": [],
+        "status": STATUS_READ_ERROR,
+        "resolved_cutoff": None,
+    }
+    cutoff_text = get_cutoff_text_from_excel(excel_path)
+    if cutoff_text == "READ_ERROR":
+        return result
+    if cutoff_text is not None and not pd.isna(cutoff_text):
+        result["expected_cutoff"] = str(cutoff_text)
+
+    try:
+        pdf_text = extract_pdf_text(pdf_path)
+    except Exception as e:
+        logging.error(f"{pdf_path} dosyasını okurken hata oluştu: {e}")
+        return result
+
+    expected = result["expected_cutoff"]
+    markers = ([expected] if expected else []) + list(fallback_markers)
+    found = find_markers(pdf_text, markers)
+    result["found_markers"] = found
+
+    if expected and expected in found:
+        result["status"] = STATUS_OK
+        result["resolved_cutoff"] = expected
+    elif found:
+        result["status"] = STATUS_FALLBACK
+    elif expected:
+        result["status"] = STATUS_MISMATCH
+    else:
+        # verify_cutoff_in_pdf ile aynı şekilde cutoff olmadan devam edilir
+        result["status"] = STATUS_NO_CUTOFF
+        result["resolved_cutoff"] = STATUS_NO_CUTOFF
+    return result
+
+def _verify_cutoff_pair_task(args):
+    return verify_cutoff_pair(*args)
+
+def verify_cutoffs_in_folder(folder, report_path, fallback_markers=None, max_workers=None):
+    """
+    Klasördeki tüm PDF/XLSX çiftlerini paralel olarak doğrular ve sonuçları tek bir
+    JSON rapor dosyasına yazar. Hiçbir adımda kullanıcı girdisi beklenmez;
+    uyuşmazlıklar daha sonra `resolve_cutoff_report` ile çözülür.
+    Yedek işaretler verilmezse config'deki `cutoff_fallback_markers` kullanılır;
+    `max_workers` None iken ProcessPoolExecutor tüm çekirdekleri kullanır.
+    """
+    if fallback_markers is None:
+        fallback_markers = get_cutoff_fallback_markers()
+    pairs = find_cutoff_pairs(folder)
+    tasks = [(pdf_path, excel_path, tuple(fallback_markers)) for pdf_path, excel_path in pairs]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_verify_cutoff_pair_task, tasks))
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+    report = {
+        "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "folder": folder,
+        "fallback_markers": list(fallback_markers),
+        "summary": counts,
+        "results": results,
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+    logging.info(f"Cutoff doğrulama raporu kaydedildi: {report_path} - {counts}")
+    return report
+
+def resolve_cutoff_report(report_path):
+    """
+    Rapordaki OK olmayan satırları kullanıcıya sorarak çözer ve raporu günceller.
+    """
+    with open(report_path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+
+    pending = [r for r in report["results"] if r["resolved_cutoff"] is None]
+    print(f"Çözülmesi gereken {len(pending)} kayıt var.")
+
+    for result in pending:
+        print(f"\nDosya: {result['pdf']}")
+        print(f"Durum: {result['status']}")
+        print(f"Beklenen cutoff metni: {result['expected_cutoff']}")
+        found = result["found_markers"]
+        for idx, marker in enumerate(found, 1):
+            print(f"{idx}. Bulunan işaret: {marker}")
+
+        while True:
+            choice = input(f"{'1-' + str(len(found)) + ' arası işaret seç, ' if found else ''}"
+                           "Y- Yeni cutoff metni gir, C- Cutoff olmadan devam et, "
+                           "A- Atla, K- Kaydet ve çık\nSeçiminiz: ").upper()
+            if choice.isdigit() and 1 <= int(choice) <= len(found):
+                result["resolved_cutoff"] = found[int(choice) - 1]
+                break
+            elif choice == 'Y':
+                cutoff_text = input("Yeni cutoff metni girin: ")
+                try:
+                    pdf_text = extract_pdf_text(result["pdf"])
+                except Exception as e:
+                    logging.error(f"{result['pdf']} dosyasını okurken hata oluştu: {e}")
+                    print("PDF dosyası okunamadı.")
+                    continue
+                if cutoff_text and cutoff_text in pdf_text:
+                    result["resolved_cutoff"] = cutoff_text
+                    break
+                print("Yeni cutoff metni PDF içinde bulunamadı.")
+            elif choice == 'C':
+                result["resolved_cutoff"] = STATUS_NO_CUTOFF
+                break
+            elif choice == 'A':
+                break
+            elif choice == 'K':
+                _save_cutoff_report(report, report_path)
+                return report
+            else:
+                print("Lütfen geçerli bir seçim yapınız.")
+
+    _save_cutoff_report(report, report_path)
+    return report
+
+def _save_cutoff_report(report, report_path):
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+    logging.info(f"Cutoff doğrulama raporu güncellendi: {report_path}")
+
+def main():
+    """
+    Kullanım: python cutoff_utils.py <klasör> [rapor.json]
+    Önce tüm klasörü paralel doğrular, ardından istenirse uyuşmazlıkları çözer.
+    """
+    if len(sys.argv) < 2:
+        print("Kullanım: python cutoff_utils.py <klasör> [rapor.json]")
+        return
+    folder = sys.argv[1]
+    report_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(folder, "cutoff_report.json")
+
+    report = verify_cutoffs_in_folder(folder, report_path)
+    print(f"\n{len(report['results'])} dosya çifti doğrulandı. Rapor: {report_path}")
+    for status, count in sorted(report["summary"].items()):
+        print(f"{status}: {count}")
+
+    if any(result["resolved_cutoff"] is None for result in report["results"]):
+        choice = input("\nUyuşmazlıkları şimdi çözmek ister misiniz? (E/H): ").upper()
+        if choice == 'E':
+            resolve_cutoff_report(report_path)
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    main()
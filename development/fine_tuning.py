@@ -3,7 +3,57 @@ import logging
 import time
 import json
 from datetime import datetime
-from config_utils import save_model_info, get_model_pricing
+from config_utils import save_model_info, update_model_info, get_model_pricing
+
+def estimate_jsonl_tokens(jsonl_file):
+  """JSONL dosyasındaki mesajlar için tahmini (epoch başına) token sayısını hesaplar."""
+  total_tokens = 0
+  with open(jsonl_file, 'r', encoding='utf-8') as f:
+      for line in f:
+          entry = json.loads(line)
+          for message in entry["messages"]:
+              content = message["content"]
+              words = content.split()
+              estimated_tokens = 0
+              for word in words:
+                  estimated_tokens += len(word) / 3  # 3 karakter ≈ 1 token
+                  if any(c.isdigit() for c in word):
+                      estimated_tokens += 0.5
+                  if any(not c.isalnum() for c in word):
+                      estimated_tokens += 0.5
+              if message["role"] == "assistant":
+                  estimated_tokens *= 1.2  # JSON yapısı için %20 ek token
+              total_tokens += estimated_tokens
+  return total_tokens
+
+def create_training_info(job_id, explanation, model_type, epochs,
+                         estimated_training_tokens, estimated_cost, sweep_id=None):
+  """İş oluşturulduğu anda model kayıtlarına yazılacak bilgileri hazırlar."""
+  return {
+      "model_id": job_id,
+      "explanation": explanation,
+      "model_type": model_type,
+      "base_model": model_type,  # İlk eğitimde base_model = model_type
+      "epochs": epochs,
+      "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+      "estimated_training_tokens": estimated_training_tokens,
+      "estimated_cost": estimated_cost,
+      "status": "running",
+      "trained_tokens": None,
+      "fine_tuned_model": None,
+      "sweep_id": sweep_id
+  }
+
+def finish_training_info(job_status):
+  """Biten işin son durumunu model kayıtlarında günceller."""
+  updates = {
+      "status": job_status.status,
+      "trained_tokens": getattr(job_status, "trained_tokens", None),
+      "fine_tuned_model": getattr(job_status, "fine_tuned_model", None),
+      "finished_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+  }
+  update_model_info(job_status.id, updates)
+  return updates
 
 def fine_tune_model(api_key, jsonl_file, model_type, explanation, epochs=5):
   """OpenAI API kullanarak model eğitimi yapar."""
@@ -17,25 +67,7 @@ def fine_tune_model(api_key, jsonl_file, model_type, explanation, epochs=5):
           )
 
       # Eğitim başlamadan önce tahmini token ve maliyet hesaplama
-      # Bu kısmı IsBankCreditCards.py'den alacağız
-      total_tokens = 0
-      with open(jsonl_file, 'r', encoding='utf-8') as f:
-          for line in f:
-              entry = json.loads(line)
-              for message in entry["messages"]:
-                  content = message["content"]
-                  words = content.split()
-                  estimated_tokens = 0
-                  for word in words:
-                      estimated_tokens += len(word) / 3
-                      if any(c.isdigit() for c in word):
-                          estimated_tokens += 0.5
-                      if any(not c.isalnum() for c in word):
-                          estimated_tokens += 0.5
-                  if message["role"] == "assistant":
-                      estimated_tokens *= 1.2
-                  total_tokens += estimated_tokens
-
+      total_tokens = estimate_jsonl_tokens(jsonl_file)
       estimated_training_tokens = total_tokens * epochs
       pricing = get_model_pricing()
       cost_per_1M = pricing[model_type]["training_cost_per_1M"]
@@ -50,34 +82,113 @@ def fine_tune_model(api_key, jsonl_file, model_type, explanation, epochs=5):
           }
       )
 
+      # İş kaydını hemen oluştur, eğitim bitince güncellenecek
+      save_model_info(create_training_info(
+          job.id, explanation, model_type, epochs, estimated_training_tokens, estimated_cost))
+
       logging.info(f"Model eğitimi başlatıldı. Job ID: {job.id}")
       print(f"Model eğitimi başlatıldı. Job ID: {job.id}")
 
       # Eğitim durumunu takip et
       while True:
           job_status = client.fine_tuning.jobs.retrieve(job.id)
-          if job_status.status in ['succeeded', 'failed']:
+          if job_status.status in ['succeeded', 'failed', 'cancelled']:
               break
           time.sleep(60)  # 1 dakika bekle
 
-      if job_status.status == 'failed':
+      finish_training_info(job_status)
+      if job_status.status != 'succeeded':
           raise Exception(f"Eğitim başarısız: {job_status.error}")
 
-      # Model bilgilerini kaydet
-      training_info = {
-          "model_id": job.id,
-          "explanation": explanation,
-          "model_type": model_type,
-          "base_model": model_type,  # İlk eğitimde base_model = model_type
-          "epochs": epochs,
-          "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-          "estimated_training_tokens": estimated_training_tokens,
-          "estimated_cost": estimated_cost
-      }
-      save_model_info(training_info)
       return job.id
 
   except Exception as e:
       logging.error(f"Model eğitimi sırasında hata oluştu: {e}")
       print(f"Model eğitimi sırasında hata oluştu: {e}")
-      return None
\ No newline at end of file
+      return None
+
+def fine_tune_sweep(api_key, jsonl_file, configs, explanation, poll_interval=60, max_status_errors=5):
+  """
+  Birden fazla (model tipi, epoch) konfigürasyonunu tek bir yüklenmiş dosya ile
+  aynı anda eğitir. `configs` her biri model_type, epochs, estimated_training_tokens
+  ve estimated_cost içeren sözlüklerden oluşur. Her iş oluşturulduğu anda model
+  kayıtlarına eklenir ve bittiğinde son durumu ile güncellenir. Durumu
+  `max_status_errors` kez üst üste alınamayan iş "unknown" olarak işaretlenir.
+  """
+  client = OpenAI(api_key=api_key)
+  sweep_id = datetime.now().strftime('sweep-%Y%m%d-%H%M%S')
+  try:
+      # Dosyayı tüm işler için bir kez yükle
+      with open(jsonl_file, 'rb') as f:
+          file_response = client.files.create(
+              file=f,
+              purpose='fine-tune'
+          )
+  except Exception as e:
+      logging.error(f"Eğitim dosyası yüklenemedi: {e}")
+      print(f"Eğitim dosyası yüklenemedi: {e}")
+      return []
+
+  # Tüm işleri beklemeden başlat ve hemen kaydet
+  jobs = []
+  for config in configs:
+      try:
+          job = client.fine_tuning.jobs.create(
+              training_file=file_response.id,
+              model=config["model_type"],
+              hyperparameters={
+                  "n_epochs": config["epochs"]
+              }
+          )
+      except Exception as e:
+          logging.error(f"{config['model_type']} ({config['epochs']} epoch) eğitimi başlatılamadı: {e}")
+          print(f"{config['model_type']} ({config['epochs']} epoch) eğitimi başlatılamadı: {e}")
+          continue
+
+      training_info = create_training_info(
+          job.id, explanation, config["model_type"], config["epochs"],
+          config["estimated_training_tokens"], config["estimated_cost"], sweep_id)
+      save_model_info(training_info)
+      jobs.append(training_info)
+      logging.info(f"Model eğitimi başlatıldı. Job ID: {job.id} ({config['model_type']}, {config['epochs']} epoch)")
+      print(f"Model eğitimi başlatıldı. Job ID: {job.id} ({config['model_type']}, {config['epochs']} epoch)")
+
+  # Tüm işlerin durumunu tek döngüde takip et
+  pending = list(jobs)
+  status_errors = {}
+  while pending:
+      still_pending = []
+      for training_info in pending:
+          job_id = training_info["model_id"]
+          try:
+              job_status = client.fine_tuning.jobs.retrieve(job_id)
+              status_errors[job_id] = 0
+          except Exception as e:
+              status_errors[job_id] = status_errors.get(job_id, 0) + 1
+              if status_errors[job_id] < max_status_errors:
+                  logging.warning(f"{job_id} durumu alınamadı ({status_errors[job_id]}/{max_status_errors}): {e}")
+                  still_pending.append(training_info)
+                  continue
+              # Art arda hata alan iş takipten çıkarılır, kayıtta durumu bilinmiyor olarak kalır
+              logging.error(f"{job_id} durumu {max_status_errors} kez üst üste alınamadı, takip bırakılıyor: {e}")
+              print(f"{job_id} durumu alınamadı, takip bırakılıyor.")
+              training_info["status"] = "unknown"
+              update_model_info(job_id, {"status": "unknown"})
+              continue
+          if job_status.status not in ['succeeded', 'failed', 'cancelled']:
+              still_pending.append(training_info)
+              continue
+
+          training_info.update(finish_training_info(job_status))
+          if job_status.status == 'succeeded':
+              logging.info(f"Eğitim tamamlandı: {job_id}")
+              print(f"Eğitim tamamlandı: {job_id}")
+          else:
+              logging.error(f"Eğitim başarısız: {job_id} - {job_status.error}")
+              print(f"Eğitim başarısız: {job_id} ({job_status.status})")
+
+      pending = still_pending
+      if pending:
+          time.sleep(poll_interval)
+
+  return jobs
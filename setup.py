@@ -6,6 +6,7 @@ setup(
     packages=find_packages(), 
     install_requires=[ 
         'openai==1.0.0', 
+        'numpy', 
         'pandas', 
         'PyMuPDF', 
     ], 
@@ -1 +1,304 @@
- 
+import os
+import re
+import json
+import logging
+from datetime import datetime, date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+import numpy as np
+
+# Disk formatındaki dosya adları (her sütun ayrı bir .npy dosyasında tutulur)
+META_FILENAME = "meta.json"
+COLUMN_FILES = {
+    "dates": "dates.npy",
+    "amounts": "amounts.npy",
+    "description_codes": "description_codes.npy",
+    "installment_no": "installment_no.npy",
+    "installment_count": "installment_count.npy",
+}
+FORMAT_VERSION = 1
+
+INSTALLMENT_PATTERN = re.compile(r"(\d+)\s*/\s*(\d+)")
+THOUSANDS_PATTERN = re.compile(r"^-?\d{1,3}(\.\d{3})+$")
+TURKISH_DECIMAL_PATTERN = re.compile(r"^-?(\d{1,3}(\.\d{3})+|\d+),\d+$")
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y")
+
+
+def _is_missing(value):
+    """None, NaN/NaT ve boş metin değerlerini eksik kabul eder."""
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return not value.strip()
+    try:
+        return bool(value != value)
+    except (TypeError, ValueError):
+        return False
+
+
+def _to_kurus(value):
+    """Tutarı kuruş cinsinden tam sayıya çevirir ('1.234,56' gibi metinleri de kabul eder)."""
+    if _is_missing(value):
+        return 0
+    if isinstance(value, str):
+        text = value.strip().replace(" ", "").replace("TL", "")
+        if "," in text:
+            # Virgül yalnızca Türkçe ondalık ayıracı olarak kabul edilir ('1.234,56')
+            if not TURKISH_DECIMAL_PATTERN.match(text):
+                raise ValueError(f"Tutar biçimi tanınmadı: {value!r}")
+            text = text.replace(".", "").replace(",", ".")
+        elif THOUSANDS_PATTERN.match(text):
+            text = text.replace(".", "")
+        value = text
+    try:
+        amount = Decimal(str(value)) * 100
+        return int(amount.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+    except (InvalidOperation, ValueError, OverflowError):
+        raise ValueError(f"Tutar biçimi tanınmadı: {value!r}")
+
+
+def _to_date(value):
+    """Tarih değerini numpy datetime64[D] değerine çevirir."""
+    if isinstance(value, (datetime, date)):
+        return np.datetime64(value.strftime("%Y-%m-%d"), "D")
+    if isinstance(value, np.datetime64):
+        return value.astype("datetime64[D]")
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return np.datetime64(datetime.strptime(text, fmt).strftime("%Y-%m-%d"), "D")
+        except ValueError:
+            continue
+    raise ValueError(f"Tarih biçimi tanınmadı: {value!r}")
+
+
+def _parse_installment(value):
+    """'2/6' biçimindeki taksit bilgisini (taksit no, taksit sayısı) olarak döndürür."""
+    if _is_missing(value):
+        return 0, 0
+    match = INSTALLMENT_PATTERN.search(str(value))
+    if not match:
+        return 0, 0
+    return int(match.group(1)), int(match.group(2))
+
+
+def _group_sum(keys, values):
+    """Anahtarlara göre int64 toplamları döndürür (sıralama + reduceat, kayıpsız)."""
+    if len(keys) == 0:
+        return keys[:0], np.zeros(0, dtype=np.int64)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    unique_keys, starts = np.unique(sorted_keys, return_index=True)
+    totals = np.add.reduceat(values[order].astype(np.int64, copy=False), starts)
+    return unique_keys, totals
+
+
+class TransactionRow:
+    """TransactionBatch içindeki tek bir işlemin hafif görünümü."""
+
+    __slots__ = ("date", "description", "amount_kurus", "installment_no", "installment_count")
+
+    def __init__(self, date, description, amount_kurus, installment_no=0, installment_count=0):
+        self.date = date
+        self.description = description
+        self.amount_kurus = amount_kurus
+        self.installment_no = installment_no
+        self.installment_count = installment_count
+
+    @property
+    def amount(self):
+        """Tutarı TL cinsinden Decimal olarak döndürür."""
+        return Decimal(self.amount_kurus) / 100
+
+    def __repr__(self):
+        return (f"TransactionRow(date={self.date}, description={self.description!r}, "
+                f"amount={self.amount}, installment={self.installment_no}/{self.installment_count})")
+
+
+class TransactionBatch:
+    """
+    İşlemleri sütun bazlı numpy dizilerinde tutar.
+
+    Tutarlar int64 kuruş, tarihler datetime64[D] olarak saklanır. Açıklamalar
+    sözlük kodlamalıdır: `description_codes` her satır için `descriptions`
+    listesindeki indeksi tutar.
+    """
+
+    def __init__(self, dates, amounts, description_codes, descriptions,
+                 installment_no=None, installment_count=None):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.amounts = np.asarray(amounts, dtype=np.int64)
+        self.description_codes = np.asarray(description_codes, dtype=np.int32)
+        self.descriptions = list(descriptions)
+        size = len(self.dates)
+        if installment_no is None:
+            installment_no = np.zeros(size, dtype=np.int16)
+        if installment_count is None:
+            installment_count = np.zeros(size, dtype=np.int16)
+        self.installment_no = np.asarray(installment_no, dtype=np.int16)
+        self.installment_count = np.asarray(installment_count, dtype=np.int16)
+
+        lengths = {len(self.amounts), len(self.description_codes),
+                   len(self.installment_no), len(self.installment_count)}
+        if lengths != {size}:
+            raise ValueError("TransactionBatch sütunlarının uzunlukları eşit olmalıdır.")
+
+    @classmethod
+    def from_records(cls, records, date_key="Tarih", description_key="Açıklama",
+                     amount_key="Tutar", installment_key="Taksit"):
+        """
+        `transactions_df.to_dict('records')` çıktısı gibi satır sözlüklerinden batch oluşturur.
+
+        Tarihi boş olan satırlar (boş Excel hücreleri, özet satırları) atlanır.
+        """
+        dates = []
+        amounts = []
+        installment_no = []
+        installment_count = []
+        raw_descriptions = []
+
+        for idx, record in enumerate(records):
+            if _is_missing(record.get(date_key)):
+                logging.warning(f"{idx}. satırda tarih bulunamadı, satır atlanıyor.")
+                continue
+            try:
+                dates.append(_to_date(record[date_key]))
+                amounts.append(_to_kurus(record.get(amount_key)))
+            except ValueError as e:
+                raise ValueError(f"{idx}. satır işlenemedi: {e}") from e
+            description = record.get(description_key)
+            raw_descriptions.append("" if _is_missing(description) else str(description).strip())
+            number, count = _parse_installment(record.get(installment_key))
+            installment_no.append(number)
+            installment_count.append(count)
+
+        descriptions, codes = np.unique(np.array(raw_descriptions, dtype=str), return_inverse=True)
+        return cls(np.array(dates, dtype="datetime64[D]"), amounts, codes.reshape(-1),
+                   descriptions.tolist(), installment_no, installment_count)
+
+    @classmethod
+    def concat(cls, batches):
+        """Birden fazla batch'i (ör. farklı yılların ekstreleri) tek batch'te birleştirir."""
+        batches = list(batches)
+        descriptions = []
+        index = {}
+        codes = []
+        for batch in batches:
+            mapping = np.empty(len(batch.descriptions), dtype=np.int32)
+            for code, description in enumerate(batch.descriptions):
+                if description not in index:
+                    index[description] = len(descriptions)
+                    descriptions.append(description)
+                mapping[code] = index[description]
+            codes.append(mapping[batch.description_codes])
+
+        if not batches:
+            return cls([], [], [], [])
+        return cls(
+            np.concatenate([b.dates for b in batches]),
+            np.concatenate([b.amounts for b in batches]),
+            np.concatenate(codes),
+            descriptions,
+            np.concatenate([b.installment_no for b in batches]),
+            np.concatenate([b.installment_count for b in batches]),
+        )
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, idx):
+        return TransactionRow(
+            self.dates[idx],
+            self.descriptions[self.description_codes[idx]],
+            int(self.amounts[idx]),
+            int(self.installment_no[idx]),
+            int(self.installment_count[idx]),
+        )
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def total(self):
+        """Tüm işlemlerin toplamını kuruş cinsinden döndürür."""
+        return int(self.amounts.sum())
+
+    def _amount_mask(self, spend_only):
+        """spend_only iken yalnızca pozitif tutarları (harcamaları) seçen maskeyi döndürür."""
+        if spend_only:
+            return self.amounts > 0
+        return np.ones(len(self), dtype=bool)
+
+    def monthly_totals(self, spend_only=True):
+        """
+        Ay bazında toplamları (aylar datetime64[M], toplamlar kuruş) döndürür.
+
+        `spend_only=True` iken yalnızca pozitif tutarlar harcama sayılır; ödeme ve
+        iadeler (negatif tutarlar) dahil edilmez. `False` ise net toplam döner.
+        """
+        mask = self._amount_mask(spend_only)
+        return _group_sum(self.dates[mask].astype("datetime64[M]"), self.amounts[mask])
+
+    def merchant_totals(self, spend_only=True):
+        """
+        Açıklama (işyeri) bazında toplamları, en yüksekten en düşüğe sıralı döndürür.
+
+        `spend_only` davranışı `monthly_totals` ile aynıdır.
+        """
+        mask = self._amount_mask(spend_only)
+        codes, totals = _group_sum(self.description_codes[mask], self.amounts[mask])
+        order = np.argsort(-totals, kind="stable")
+        names = np.array(self.descriptions, dtype=object)[codes[order]]
+        return names, totals[order]
+
+    def installment_schedule(self):
+        """
+        Taksitli işlemlerin kalan taksitlerini ödeneceği aylara dağıtır.
+
+        Taksit no k/n olan ve m ayında görünen bir işlem için m+1 ... m+(n-k)
+        aylarının her birine aynı tutar yazılır.
+        """
+        remaining = np.clip(self.installment_count.astype(np.int64) - self.installment_no, 0, None)
+        remaining[self.installment_count == 0] = 0
+        total_rows = int(remaining.sum())
+        if total_rows == 0:
+            return np.zeros(0, dtype="datetime64[M]"), np.zeros(0, dtype=np.int64)
+
+        rows = np.repeat(np.arange(len(self)), remaining)
+        # Her satır grubunda 1, 2, ..., remaining şeklinde artan ay farkı
+        group_starts = np.repeat(np.cumsum(remaining) - remaining, remaining)
+        offsets = np.arange(total_rows) - group_starts + 1
+        months = self.dates[rows].astype("datetime64[M]") + offsets.astype("timedelta64[M]")
+        return _group_sum(months, self.amounts[rows])
+
+    def save(self, path):
+        """Batch'i `path` klasörüne memory-map ile okunabilecek biçimde kaydeder."""
+        os.makedirs(path, exist_ok=True)
+        for attr, filename in COLUMN_FILES.items():
+            np.save(os.path.join(path, filename), getattr(self, attr))
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "rows": len(self),
+            "descriptions": self.descriptions,
+        }
+        with open(os.path.join(path, META_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        logging.info(f"İşlem verisi kaydedildi: {path} ({len(self)} satır)")
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        `save` ile kaydedilmiş batch'i yükler. `mmap=True` iken sütunlar diskten
+        salt okunur memory-map olarak açılır, veri ancak erişildiğinde okunur.
+        """
+        with open(os.path.join(path, META_FILENAME), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Desteklenmeyen işlem verisi sürümü: {meta.get('format_version')}")
+
+        mmap_mode = 'r' if mmap else None
+        columns = {
+            attr: np.load(os.path.join(path, filename), mmap_mode=mmap_mode)
+            for attr, filename in COLUMN_FILES.items()
+        }
+        return cls(descriptions=meta["descriptions"], **columns)
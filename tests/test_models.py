@@ -1 +1,123 @@
- 
+import numpy as np
+import pytest
+
+from src.models.transaction import TransactionBatch, TransactionRow, _to_kurus
+
+
+def make_batch():
+    records = [
+        {"Tarih": "2024-01-05 00:00:00", "Açıklama": "MIGROS", "Tutar": "1.234,56"},
+        {"Tarih": "15.01.2024", "Açıklama": "A101", "Tutar": 100.0, "Taksit": "2/4"},
+        {"Tarih": "2024-02-01", "Açıklama": "MIGROS", "Tutar": 5},
+        {"Tarih": "2024-02-10", "Açıklama": "ÖDEME", "Tutar": -500},
+    ]
+    return TransactionBatch.from_records(records)
+
+
+def test_to_kurus_parses_turkish_amounts():
+    assert _to_kurus("1.234,56") == 123456
+    assert _to_kurus("1.234") == 123400
+    assert _to_kurus("-1.234.567") == -123456700
+    assert _to_kurus("12,5 TL") == 1250
+    assert _to_kurus(10.1) == 1010
+    assert _to_kurus(float("nan")) == 0
+
+
+def test_to_kurus_rejects_invalid_amount():
+    with pytest.raises(ValueError, match="abc"):
+        _to_kurus("abc")
+
+
+@pytest.mark.parametrize("text", ["1,234.56", "1,2,3", "1.2,5", "12,"])
+def test_to_kurus_rejects_ambiguous_separators(text):
+    with pytest.raises(ValueError, match="Tutar biçimi"):
+        _to_kurus(text)
+
+
+def test_from_records_parses_columns():
+    batch = make_batch()
+    assert len(batch) == 4
+    assert batch.amounts.tolist() == [123456, 10000, 500, -50000]
+    assert batch.dates[1] == np.datetime64("2024-01-15")
+    assert sorted(batch.descriptions) == ["A101", "MIGROS", "ÖDEME"]
+    row = batch[1]
+    assert isinstance(row, TransactionRow)
+    assert (row.description, row.installment_no, row.installment_count) == ("A101", 2, 4)
+    assert not hasattr(row, "__dict__")
+
+
+def test_from_records_skips_missing_dates_and_blank_descriptions():
+    records = [
+        {"Tarih": float("nan"), "Açıklama": "TOPLAM", "Tutar": 999},
+        {"Tarih": "2024-01-05", "Açıklama": float("nan"), "Tutar": 10},
+    ]
+    batch = TransactionBatch.from_records(records)
+    assert len(batch) == 1
+    assert batch[0].description == ""
+
+
+def test_from_records_reports_row_of_invalid_amount():
+    with pytest.raises(ValueError, match="0. satır"):
+        TransactionBatch.from_records([{"Tarih": "2024-01-05", "Açıklama": "X", "Tutar": "abc"}])
+
+
+def test_monthly_totals():
+    months, totals = make_batch().monthly_totals()
+    assert months.tolist() == np.array(["2024-01", "2024-02"], dtype="datetime64[M]").tolist()
+    assert totals.tolist() == [133456, 500]
+
+
+def test_monthly_totals_net():
+    months, totals = make_batch().monthly_totals(spend_only=False)
+    assert totals.tolist() == [133456, -49500]
+
+
+def test_merchant_totals_counts_only_spend():
+    names, totals = make_batch().merchant_totals()
+    assert names.tolist() == ["MIGROS", "A101"]
+    assert totals.tolist() == [123956, 10000]
+
+    names, totals = make_batch().merchant_totals(spend_only=False)
+    assert names.tolist() == ["MIGROS", "A101", "ÖDEME"]
+    assert totals.tolist() == [123956, 10000, -50000]
+
+
+def test_installment_schedule():
+    months, totals = make_batch().installment_schedule()
+    assert months.tolist() == np.array(["2024-02", "2024-03"], dtype="datetime64[M]").tolist()
+    assert totals.tolist() == [10000, 10000]
+
+
+def test_concat_recodes_descriptions():
+    first = make_batch()
+    second = TransactionBatch.from_records([
+        {"Tarih": "2025-03-01", "Açıklama": "BIM", "Tutar": 1},
+        {"Tarih": "2025-03-02", "Açıklama": "MIGROS", "Tutar": 2},
+    ])
+    merged = TransactionBatch.concat([first, second])
+    assert len(merged) == 6
+    assert len(merged.descriptions) == 4
+    assert [row.description for row in merged][-2:] == ["BIM", "MIGROS"]
+    names, totals = merged.merchant_totals()
+    assert dict(zip(names.tolist(), totals.tolist()))["MIGROS"] == 124156
+
+
+def test_save_load_round_trip(tmp_path):
+    batch = make_batch()
+    batch.save(tmp_path / "batch")
+    loaded = TransactionBatch.load(tmp_path / "batch")
+
+    for column in ("dates", "amounts", "description_codes", "installment_no", "installment_count"):
+        array = getattr(loaded, column)
+        assert np.array_equal(array, getattr(batch, column))
+        assert isinstance(array.base, np.memmap) or isinstance(array, np.memmap)
+        assert not array.flags.writeable
+    assert loaded.descriptions == batch.descriptions
+    assert loaded.monthly_totals()[1].tolist() == batch.monthly_totals()[1].tolist()
+
+
+def test_load_without_mmap_returns_in_memory_columns(tmp_path):
+    make_batch().save(tmp_path / "batch")
+    loaded = TransactionBatch.load(tmp_path / "batch", mmap=False)
+    assert not isinstance(loaded.amounts.base, np.memmap)
+    assert loaded.amounts.flags.writeable
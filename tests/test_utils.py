@@ -1 +1,390 @@
- 
+import os
+import sys
+import json
+import types
+import logging
+import importlib
+
+import fitz
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "development"))
+
+import config_utils  # noqa: E402
+import cutoff_utils  # noqa: E402
+from cutoff_utils import find_markers, find_cutoff_pairs, verify_cutoff_pair  # noqa: E402
+
+PDF_TEXT = "HESAP ÖZETİ\nMIGROS 120,00\nToplam Borç 120,00\nSon Ödeme Tarihi\n"
+
+
+@pytest.fixture
+def fake_pair(monkeypatch):
+    """Excel'deki cutoff metnini ve PDF metnini dosya okumadan taklit eder."""
+    def configure(cutoff_text, pdf_text=PDF_TEXT):
+        monkeypatch.setattr(cutoff_utils, "get_cutoff_text_from_excel", lambda path: cutoff_text)
+        monkeypatch.setattr(cutoff_utils, "extract_pdf_text", lambda path: pdf_text)
+    return configure
+
+
+def test_find_markers_reports_overlapping_markers():
+    found = find_markers(PDF_TEXT, ["Toplam Borç", "Toplam", "Son Ödeme", "Yok", ""])
+    assert found == ["Toplam Borç", "Toplam", "Son Ödeme"]
+
+
+def test_find_markers_finds_short_marker_without_long_one():
+    assert find_markers("Toplam Tutar", ["Toplam Borç", "Toplam"]) == ["Toplam"]
+
+
+def test_find_markers_keeps_first_seen_order_and_ignores_duplicates():
+    assert find_markers(PDF_TEXT, ["Son Ödeme", "MIGROS", "MIGROS"]) == ["MIGROS", "Son Ödeme"]
+    assert find_markers(PDF_TEXT, []) == []
+
+
+def test_verify_cutoff_pair_ok(fake_pair):
+    fake_pair("Toplam Borç")
+    result = verify_cutoff_pair("a.pdf", "a.xlsx", ["Son Ödeme"])
+    assert result["status"] == cutoff_utils.STATUS_OK
+    assert result["resolved_cutoff"] == "Toplam Borç"
+    assert result["found_markers"] == ["Toplam Borç", "Son Ödeme"]
+
+
+def test_verify_cutoff_pair_fallback(fake_pair):
+    fake_pair("Dönem Borcu")
+    result = verify_cutoff_pair("a.pdf", "a.xlsx", ["Toplam", "Son Ödeme"])
+    assert result["status"] == cutoff_utils.STATUS_FALLBACK
+    assert result["expected_cutoff"] == "Dönem Borcu"
+    assert result["found_markers"] == ["Toplam", "Son Ödeme"]
+    assert result["resolved_cutoff"] is None
+
+
+def test_verify_cutoff_pair_mismatch(fake_pair):
+    fake_pair("Dönem Borcu")
+    result = verify_cutoff_pair("a.pdf", "a.xlsx", ["Yok"])
+    assert result["status"] == cutoff_utils.STATUS_MISMATCH
+    assert result["found_markers"] == []
+
+
+def test_verify_cutoff_pair_without_expected_cutoff(fake_pair):
+    fake_pair(None)
+    result = verify_cutoff_pair("a.pdf", "a.xlsx")
+    assert result["status"] == cutoff_utils.STATUS_NO_CUTOFF
+    assert result["resolved_cutoff"] == cutoff_utils.STATUS_NO_CUTOFF
+    assert verify_cutoff_pair("a.pdf", "a.xlsx", ["Toplam"])["status"] == cutoff_utils.STATUS_FALLBACK
+
+
+def test_verify_cutoff_pair_read_errors(fake_pair, monkeypatch):
+    fake_pair("READ_ERROR")
+    assert verify_cutoff_pair("a.pdf", "a.xlsx")["status"] == cutoff_utils.STATUS_READ_ERROR
+
+    def broken_pdf(path):
+        raise RuntimeError("bozuk dosya")
+    fake_pair("Toplam Borç")
+    monkeypatch.setattr(cutoff_utils, "extract_pdf_text", broken_pdf)
+    assert verify_cutoff_pair("a.pdf", "a.xlsx")["status"] == cutoff_utils.STATUS_READ_ERROR
+
+
+def test_find_cutoff_pairs_matches_pdf_with_xlsx(tmp_path):
+    for name in ("a.pdf", "a.xlsx", "b.pdf", "c.xlsx"):
+        (tmp_path / name).write_bytes(b"")
+    pairs = find_cutoff_pairs(str(tmp_path))
+    assert pairs == [(str(tmp_path / "a.pdf"), str(tmp_path / "a.xlsx"))]
+
+
+def write_pair(folder, name, cutoff_text, pdf_text):
+    """Gerçek bir PDF ve 'Cutoff Metni:' satırı içeren Excel dosyası yazar."""
+    with fitz.open() as doc:
+        page = doc.new_page()
+        page.insert_text((50, 50), pdf_text)
+        doc.save(str(folder / f"{name}.pdf"))
+    rows = [["Cutoff Metni:", cutoff_text]] if cutoff_text else [["Dönem:", "2024-01"]]
+    pd.DataFrame(rows).to_excel(folder / f"{name}.xlsx", header=False, index=False)
+
+
+def test_verify_cutoffs_in_folder_writes_report(tmp_path):
+    write_pair(tmp_path, "ok", "Toplam Borc", "MIGROS 120,00 Toplam Borc 120,00")
+    write_pair(tmp_path, "fallback", "Donem Borcu", "MIGROS 10,00 Son Odeme")
+    write_pair(tmp_path, "mismatch", "Donem Borcu", "MIGROS 10,00")
+    write_pair(tmp_path, "nocutoff", None, "MIGROS 10,00")
+    report_path = tmp_path / "report.json"
+
+    report = cutoff_utils.verify_cutoffs_in_folder(
+        str(tmp_path), str(report_path), fallback_markers=["Son Odeme"], max_workers=2)
+
+    with open(report_path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved == report
+    assert saved["fallback_markers"] == ["Son Odeme"]
+    assert saved["summary"] == {"OK": 1, "FALLBACK": 1, "MISMATCH": 1, "NO_CUTOFF": 1}
+    results = {os.path.basename(r["pdf"]): r for r in saved["results"]}
+    assert results["ok.pdf"]["resolved_cutoff"] == "Toplam Borc"
+    assert results["fallback.pdf"]["found_markers"] == ["Son Odeme"]
+    assert results["mismatch.pdf"]["resolved_cutoff"] is None
+    assert results["nocutoff.pdf"]["resolved_cutoff"] == cutoff_utils.STATUS_NO_CUTOFF
+
+
+def test_verify_cutoffs_in_folder_uses_config_markers(tmp_path, monkeypatch):
+    write_pair(tmp_path, "a", "Donem Borcu", "MIGROS 10,00 Son Odeme")
+    monkeypatch.setattr(cutoff_utils, "get_cutoff_fallback_markers", lambda: ["Son Odeme"])
+    report = cutoff_utils.verify_cutoffs_in_folder(str(tmp_path), str(tmp_path / "report.json"))
+    assert report["fallback_markers"] == ["Son Odeme"]
+    assert report["results"][0]["status"] == cutoff_utils.STATUS_FALLBACK
+
+
+def make_report(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"results": results}, f)
+
+
+def report_row(name, status, found=(), resolved=None):
+    return {"pdf": name, "excel": name.replace(".pdf", ".xlsx"), "expected_cutoff": "Dönem Borcu",
+            "found_markers": list(found), "status": status, "resolved_cutoff": resolved}
+
+
+def answer(monkeypatch, answers):
+    answers = iter(answers)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+
+
+def test_resolve_cutoff_report_saves_choices(tmp_path, monkeypatch):
+    report_path = tmp_path / "report.json"
+    make_report(report_path, [
+        report_row("ok.pdf", "OK", ["Dönem Borcu"], "Dönem Borcu"),
+        report_row("none.pdf", "NO_CUTOFF", resolved="NO_CUTOFF"),
+        report_row("fallback.pdf", "FALLBACK", ["Toplam", "Son Ödeme"]),
+        report_row("new.pdf", "MISMATCH"),
+        report_row("skip.pdf", "MISMATCH"),
+    ])
+    monkeypatch.setattr(cutoff_utils, "extract_pdf_text", lambda path: PDF_TEXT)
+    # Yalnızca çözülmemiş üç satır sorulur; geçersiz seçim ve bulunamayan metin tekrar sorulur
+    answer(monkeypatch, ["2", "X", "Y", "Yok", "Y", "Toplam Borç", "A"])
+
+    cutoff_utils.resolve_cutoff_report(str(report_path))
+
+    with open(report_path, encoding="utf-8") as f:
+        resolved = [r["resolved_cutoff"] for r in json.load(f)["results"]]
+    assert resolved == ["Dönem Borcu", "NO_CUTOFF", "Son Ödeme", "Toplam Borç", None]
+
+
+def test_resolve_cutoff_report_save_and_exit(tmp_path, monkeypatch):
+    report_path = tmp_path / "report.json"
+    make_report(report_path, [
+        report_row("a.pdf", "MISMATCH"),
+        report_row("b.pdf", "MISMATCH"),
+        report_row("c.pdf", "MISMATCH"),
+    ])
+    answer(monkeypatch, ["C", "K"])
+
+    cutoff_utils.resolve_cutoff_report(str(report_path))
+
+    with open(report_path, encoding="utf-8") as f:
+        resolved = [r["resolved_cutoff"] for r in json.load(f)["results"]]
+    assert resolved == ["NO_CUTOFF", None, None]
+
+
+def test_sweep_grid_skips_invalid_values(monkeypatch):
+    monkeypatch.setattr(config_utils, "load_config", lambda: {
+        "model_pricing": {"gpt-a": {}, "gpt-b": {}},
+        "fine_tune_sweep": {"model_types": ["gpt-a", 3, ""], "epochs": [3, "5", 0, -1, True, 3]},
+    })
+    assert config_utils.get_fine_tune_sweep_grid() == (["gpt-a"], [3])
+
+
+def test_sweep_grid_falls_back_to_defaults(monkeypatch):
+    monkeypatch.setattr(config_utils, "load_config", lambda: {
+        "model_pricing": {"gpt-a": {}, "gpt-b": {}},
+        "default_epochs": 4,
+        "fine_tune_sweep": ["gpt-a"],
+    })
+    assert config_utils.get_fine_tune_sweep_grid() == (["gpt-a", "gpt-b"], [4])
+
+
+class StubJobs:
+    """Fine-tuning işlerini taklit eder; her iş ikinci sorguda biter."""
+
+    def __init__(self, final_statuses, failing_models=(), broken_jobs=()):
+        self.final_statuses = final_statuses
+        self.failing_models = failing_models
+        self.broken_jobs = broken_jobs
+        self.created = []
+        self.retrieved = {}
+
+    def create(self, training_file, model, hyperparameters):
+        if model in self.failing_models:
+            raise RuntimeError("geçersiz model")
+        job_id = f"ftjob-{len(self.created) + 1}"
+        self.created.append((job_id, training_file, model, hyperparameters["n_epochs"]))
+        return types.SimpleNamespace(id=job_id)
+
+    def retrieve(self, job_id):
+        if job_id in self.broken_jobs:
+            raise RuntimeError("iş bulunamadı")
+        self.retrieved[job_id] = self.retrieved.get(job_id, 0) + 1
+        if self.retrieved[job_id] < 2:
+            return types.SimpleNamespace(id=job_id, status="running")
+        status = self.final_statuses.get(job_id, "succeeded")
+        return types.SimpleNamespace(
+            id=job_id, status=status, error=None, trained_tokens=1234,
+            fine_tuned_model=f"ft:{job_id}" if status == "succeeded" else None)
+
+
+@pytest.fixture
+def stub_openai(monkeypatch, tmp_path):
+    """openai modülünü taklit eder ve model kayıtlarını geçici dosyaya yönlendirir."""
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace(OpenAI=None))
+    fine_tuning = importlib.import_module("fine_tuning")
+    model_info_path = tmp_path / "model_info.json"
+    monkeypatch.setattr(config_utils, "model_info_path", str(model_info_path))
+    jsonl_path = tmp_path / "train.jsonl"
+    jsonl_path.write_text(json.dumps({"messages": [{"role": "user", "content": "abc 12"}]}) + "\n",
+                          encoding="utf-8")
+
+    def configure(**jobs_options):
+        jobs = StubJobs(**jobs_options)
+        uploads = []
+
+        def create_file(file, purpose):
+            uploads.append(purpose)
+            return types.SimpleNamespace(id="file-1")
+
+        client = types.SimpleNamespace(
+            files=types.SimpleNamespace(create=create_file),
+            fine_tuning=types.SimpleNamespace(jobs=jobs))
+        monkeypatch.setattr(fine_tuning, "OpenAI", lambda api_key: client)
+        return fine_tuning, jobs, uploads, str(jsonl_path), model_info_path
+    return configure
+
+
+def sweep_config(model_type, epochs):
+    return {"model_type": model_type, "epochs": epochs,
+            "estimated_training_tokens": 100 * epochs, "estimated_cost": 0.1 * epochs}
+
+
+def load_registry(model_info_path):
+    with open(model_info_path, encoding="utf-8") as f:
+        return {entry["model_id"]: entry for entry in json.load(f)}
+
+
+def test_fine_tune_sweep_records_every_job(stub_openai):
+    fine_tuning, jobs, uploads, jsonl_path, model_info_path = stub_openai(
+        final_statuses={"ftjob-2": "failed"}, failing_models=("gpt-bad",))
+    configs = [sweep_config("gpt-a", 1), sweep_config("gpt-bad", 1), sweep_config("gpt-b", 3)]
+
+    results = fine_tuning.fine_tune_sweep("key", jsonl_path, configs, "deneme", poll_interval=0)
+
+    assert uploads == ["fine-tune"]
+    assert [(job[1], job[2], job[3]) for job in jobs.created] == [
+        ("file-1", "gpt-a", 1), ("file-1", "gpt-b", 3)]
+    registry = load_registry(model_info_path)
+    assert set(registry) == {"ftjob-1", "ftjob-2"}
+    assert len({entry["sweep_id"] for entry in registry.values()}) == 1
+    assert registry["ftjob-1"]["status"] == "succeeded"
+    assert registry["ftjob-1"]["fine_tuned_model"] == "ft:ftjob-1"
+    assert registry["ftjob-2"]["status"] == "failed"
+    assert registry["ftjob-2"]["model_type"] == "gpt-b"
+    assert registry["ftjob-2"]["epochs"] == 3
+    assert registry["ftjob-2"]["estimated_training_tokens"] == 300
+    for entry in registry.values():
+        assert entry["trained_tokens"] == 1234
+    assert [r["status"] for r in results] == ["succeeded", "failed"]
+
+
+def test_fine_tune_sweep_records_job_before_it_finishes(stub_openai, monkeypatch):
+    fine_tuning, jobs, uploads, jsonl_path, model_info_path = stub_openai(final_statuses={})
+    seen = []
+    original_retrieve = jobs.retrieve
+
+    def retrieve(job_id):
+        seen.append(load_registry(model_info_path)[job_id]["status"])
+        return original_retrieve(job_id)
+    monkeypatch.setattr(jobs, "retrieve", retrieve)
+
+    fine_tuning.fine_tune_sweep("key", jsonl_path, [sweep_config("gpt-a", 2)], "deneme", poll_interval=0)
+
+    assert seen[0] == "running"
+    assert load_registry(model_info_path)["ftjob-1"]["status"] == "succeeded"
+
+
+def test_fine_tune_sweep_gives_up_on_unreachable_job(stub_openai):
+    fine_tuning, jobs, uploads, jsonl_path, model_info_path = stub_openai(
+        final_statuses={}, broken_jobs=("ftjob-1",))
+    configs = [sweep_config("gpt-a", 1), sweep_config("gpt-b", 1)]
+
+    results = fine_tuning.fine_tune_sweep(
+        "key", jsonl_path, configs, "deneme", poll_interval=0, max_status_errors=3)
+
+    assert [r["status"] for r in results] == ["unknown", "succeeded"]
+    registry = load_registry(model_info_path)
+    assert registry["ftjob-1"]["status"] == "unknown"
+    assert registry["ftjob-2"]["status"] == "succeeded"
+
+
+def test_fine_tune_model_uses_same_registry_fields(stub_openai, monkeypatch):
+    fine_tuning, jobs, uploads, jsonl_path, model_info_path = stub_openai(final_statuses={})
+    monkeypatch.setattr(fine_tuning, "get_model_pricing",
+                        lambda: {"gpt-a": {"training_cost_per_1M": 1.0}})
+    fine_tuning.fine_tune_sweep("key", jsonl_path, [sweep_config("gpt-a", 1)], "sweep", poll_interval=0)
+    monkeypatch.setattr(fine_tuning.time, "sleep", lambda seconds: None)
+
+    assert fine_tuning.fine_tune_model("key", jsonl_path, "gpt-a", "tek", epochs=2) == "ftjob-2"
+
+    registry = load_registry(model_info_path)
+    assert set(registry["ftjob-1"]) - {"sweep_id"} == set(registry["ftjob-2"]) - {"sweep_id"}
+    assert registry["ftjob-2"]["sweep_id"] is None
+    assert registry["ftjob-2"]["status"] == "succeeded"
+    assert registry["ftjob-2"]["trained_tokens"] == 1234
+
+
+@pytest.fixture
+def isbank(monkeypatch, stub_openai):
+    """IsBankCreditCards modülünü log dosyası oluşturmadan içe aktarır."""
+    stub_openai(final_statuses={})
+    monkeypatch.setattr(logging, "basicConfig", lambda **kwargs: None)
+    return importlib.import_module("IsBankCreditCards")
+
+
+def test_estimate_sweep_costs_prices_grid_from_one_count(isbank, monkeypatch):
+    monkeypatch.setattr(isbank, "get_model_pricing", lambda: {
+        "gpt-a": {"training_cost_per_1M": 2.0}, "gpt-b": {"training_cost_per_1M": 10.0}})
+
+    configs = isbank.estimate_sweep_costs(1_000_000, ["gpt-a", "gpt-x", "gpt-b"], [1, 3])
+
+    assert [(c["model_type"], c["epochs"]) for c in configs] == [
+        ("gpt-a", 1), ("gpt-a", 3), ("gpt-b", 1), ("gpt-b", 3)]
+    assert [c["estimated_training_tokens"] for c in configs] == [1_000_000, 3_000_000] * 2
+    assert [c["estimated_cost"] for c in configs] == pytest.approx([2.0, 6.0, 10.0, 30.0])
+
+
+def test_run_sweep_counts_tokens_once_and_launches_selection(isbank, monkeypatch):
+    token_counts = []
+    launched = {}
+    monkeypatch.setattr(isbank, "get_fine_tune_sweep_grid", lambda: (["gpt-a", "gpt-b"], [1, 2]))
+    monkeypatch.setattr(isbank, "get_model_pricing", lambda: {
+        "gpt-a": {"training_cost_per_1M": 1.0}, "gpt-b": {"training_cost_per_1M": 1.0}})
+    monkeypatch.setattr(isbank, "estimate_jsonl_tokens", lambda path: token_counts.append(path) or 100)
+
+    def fake_sweep(api_key, jsonl_file, configs, explanation):
+        launched.update(configs=configs, explanation=explanation)
+        return []
+    monkeypatch.setattr(isbank, "fine_tune_sweep", fake_sweep)
+    answer(monkeypatch, ["1,4", "E", "karşılaştırma"])
+
+    isbank.run_sweep("key", "train.jsonl")
+
+    assert token_counts == ["train.jsonl"]
+    assert [(c["model_type"], c["epochs"]) for c in launched["configs"]] == [("gpt-a", 1), ("gpt-b", 2)]
+    assert launched["explanation"] == "karşılaştırma"
+
+
+def test_get_saved_models_hides_unfinished_jobs(isbank, monkeypatch, tmp_path):
+    model_info_path = tmp_path / "saved.json"
+    model_info_path.write_text(json.dumps([
+        {"model_id": "eski"},
+        {"model_id": "ok", "status": "succeeded"},
+        {"model_id": "devam", "status": "running"},
+        {"model_id": "hata", "status": "failed"},
+        {"model_id": "bilinmiyor", "status": "unknown"},
+    ]), encoding="utf-8")
+    monkeypatch.setattr(isbank, "model_info_path", str(model_info_path))
+
+    assert [m["model_id"] for m in isbank.get_saved_models()] == ["eski", "ok"]